@@ -1,24 +1,151 @@
 """Cache and artifact organization for Unison sync."""
 
-import glob
+import functools
+import logging
 import os
 import shutil
+import stat
 import subprocess
-from typing import Any
+import tempfile
+from typing import Any, Collection
+
+logger = logging.getLogger(__name__)
+
+# Log files larger than max_lines * AVG_BYTES_PER_LINE are considered too large
+# without counting their lines.
+AVG_BYTES_PER_LINE = 200
+
+_COUNT_CHUNK_SIZE = 1 << 20
+
+COMMON_PRF_FILENAME = "unison-common_settings.prf"
+
+# Latest health check results, written by the monitor loop for status queries.
+HEALTH_STATE_FILENAME = "heartbeat-health.json"
+
+# Process umask, read once at import (os.umask can only be queried by setting
+# it, which is not thread-safe); used for files created by write_if_changed.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_COMMON_PRF_TEMPLATE = """ignore = Name {{.DS_Store,.Spotlight-V100,.Trashes,.fseventsd}}
+ignore = Path */{{.metadata,.settings,.project,.classpath}}
+ignore = Name {{.iml,.iws}}
+ignore = Path */.idea
+ignore = Name {{[._]*.s[a-v][a-z],[._]*.sw[a-p],[._]s[a-v][a-z],[._]sw[a-p],Session.vim,Sessionx.vim}}
+ignore = BelowPath */{{env,logs,out}}
+ignore    = Path */build/*/*/*/*/build/{{,.}}?*
+ignorenot = Path */build/*/*/*/*/build/brazil-integration-tests
+ignore    = Path */build/*/*/*/*/build/brazil-integration-tests/{{,.}}?*
+ignorenot = Path */build/*/*/*/*/build/brazil-integration-tests/{{*.html,*.css,com}}
+ignorenot = Path */build/*/*/*/*/build/brazil-integ-tests
+ignore    = Path */build/*/*/*/*/build/brazil-integ-tests/{{,.}}?*
+ignorenot = Path */build/*/*/*/*/build/brazil-integ-tests/{{*.html,*.css,com}}
+ignorenot = Path */build/*/*/*/*/build/brazil-unit-tests
+ignore    = Path */build/*/*/*/*/build/brazil-unit-tests/{{,.}}?*
+ignorenot = Path */build/*/*/*/*/build/brazil-unit-tests/{{*.html,*.css,com}}
+ignorenot = Path */build/*/*/*/*/build/generated-src
+ignore    = Path */build/*/*/*/*/build/generated-src/{{,.}}?*
+ignorenot = Path */build/*/*/*/*/build/generated-src/{{*.html,*.css,com}}
+ignore = Name log{{,s}}/*.log{{,.*}}
+ignore  = Path Neuron-Nemo-Megatron/src/Neuron-Nemo-Megatron/nemo/examples/nlp/language_modeling/neuronxcc-*
+ignore  = Path context_parallel/neuronxcc-*
+ignore = Path .unison
+ignorecase = false
+repeat = {sync_interval}
+backup = Name *
+maxbackups = 5
+retry = 1
+auto = true
+batch = true
+confirmbigdeletes = true
+times = true
+prefer = newer
+terse = true
+contactquietly = true"""
 
 
 def _count_lines(filepath: str) -> int:
     """
     Count the number of lines in a file.
 
+    Reads the file in binary chunks and counts newline bytes, so the scan
+    runs in C without decoding or materialising individual lines. A trailing
+    line without a newline is counted as well.
+
     Args:
         filepath: Path to the file.
 
     Returns:
         Number of lines in the file.
     """
-    with open(filepath) as f:
-        return sum(1 for _ in f)
+    lines = 0
+    last = b"\n"
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(_COUNT_CHUNK_SIZE), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines if last == b"\n" else lines + 1
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Atomically write content to a file unless it already holds that content.
+
+    Skipping identical rewrites keeps the file's mtime stable, so Unison and
+    the filesystem event machinery see no change. A replaced file keeps its
+    permission bits; a new one gets the usual umask-derived mode.
+
+    Args:
+        path: Destination file path.
+        content: Text to write.
+
+    Returns:
+        True if the file was written, False if it was already up to date.
+    """
+    data = content.encode()
+    mode = 0o666 & ~_UMASK
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+            mode = stat.S_IMODE(os.fstat(f.fileno()).st_mode)
+    except FileNotFoundError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _get_unison_paths(unison_log_dir: str) -> tuple[str, str, str]:
+    """
+    Compute paths for unison directories (cached for the process lifetime).
+
+    Args:
+        unison_log_dir: Directory for Unison logs.
+
+    Returns:
+        Tuple of (script_dir, unison_dir, unison_log_dir).
+
+    Raises:
+        EnvironmentError: If HOME environment variable is not set.
+    """
+    home_dir = os.environ.get("HOME")
+    if not home_dir:
+        raise EnvironmentError("HOME environment variable is not set")
+    return _SCRIPT_DIR, os.path.join(home_dir, ".unison"), unison_log_dir
 
 
 def get_unison_paths(config: dict[str, Any]) -> dict[str, str]:
@@ -34,22 +161,28 @@ def get_unison_paths(config: dict[str, Any]) -> dict[str, str]:
     Raises:
         EnvironmentError: If HOME environment variable is not set.
     """
-    home_dir = os.environ.get("HOME")
-    if not home_dir:
-        raise EnvironmentError("HOME environment variable is not set")
+    script_dir, unison_dir, unison_log_dir = _get_unison_paths(
+        config["unison_log_dir"]
+    )
     return {
-        "script_dir": os.path.dirname(os.path.abspath(__file__)),
-        "unison_dir": os.path.join(home_dir, ".unison"),
-        "unison_log_dir": config["unison_log_dir"],
+        "script_dir": script_dir,
+        "unison_dir": unison_dir,
+        "unison_log_dir": unison_log_dir,
     }
 
 
-def init_unison(config: dict[str, Any]) -> dict[str, str]:
+def init_unison(
+    config: dict[str, Any], keep_profiles: Collection[str] = ()
+) -> dict[str, str]:
     """
     Initialize unison directories and clean up old profile files.
 
+    Profiles that are about to be rewritten, and the common settings profile,
+    are left in place so unchanged ones keep their mtime.
+
     Args:
         config: Configuration dictionary.
+        keep_profiles: Names (without .prf) of profiles to keep in unison_dir.
 
     Returns:
         Dictionary with unison_dir and unison_log_dir paths.
@@ -59,12 +192,19 @@ def init_unison(config: dict[str, Any]) -> dict[str, str]:
     unison_dir = paths["unison_dir"]
     unison_log_dir = paths["unison_log_dir"]
 
+    remove = os.remove
+    keep = {f"{name}.prf" for name in keep_profiles} | {COMMON_PRF_FILENAME}
     for dir_to_check in [script_dir, unison_dir]:
-        if os.path.isdir(dir_to_check):
-            for file in glob.glob(f"{dir_to_check}/*"):
-                _, ext = os.path.splitext(file)
-                if ext.lower() in [".prf", ".sh"]:
-                    os.remove(file)
+        try:
+            entries = list(os.scandir(dir_to_check))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            name = entry.name
+            if dir_to_check == unison_dir and name in keep:
+                continue
+            if not name.startswith(".") and name.lower().endswith((".prf", ".sh")):
+                remove(entry.path)
 
     if not os.path.exists(unison_dir):
         os.makedirs(unison_dir)
@@ -92,7 +232,7 @@ def clean_unison_state(config: dict[str, Any]) -> None:
 
     if os.path.isdir(unison_dir):
         shutil.rmtree(unison_dir)
-        print(f"Removed: {unison_dir}")
+        logger.info(f"Removed: {unison_dir}")
 
     seen_hosts: set[str] = set()
     for sp in config["sync_points"]:
@@ -106,14 +246,14 @@ def clean_unison_state(config: dict[str, Any]) -> None:
             text=True,
         )
         if result.returncode == 0:
-            print(f"Removed ~/.unison on {ssh_name}")
+            logger.info(f"Removed ~/.unison on {ssh_name}")
         else:
-            print(f"Warning: failed on {ssh_name}: {result.stderr}")
+            logger.warning(f"Warning: failed on {ssh_name}: {result.stderr}")
 
 
 def cleanup_artifacts(config: dict[str, Any]) -> None:
     """
-    Clean up unison logs and profile files.
+    Clean up unison logs, profile files and the saved health state.
 
     Args:
         config: Configuration dictionary.
@@ -124,29 +264,53 @@ def cleanup_artifacts(config: dict[str, Any]) -> None:
 
     if os.path.isdir(unison_log_dir):
         shutil.rmtree(unison_log_dir)
-        print(f"Removed: {unison_log_dir}")
-
-    if os.path.isdir(unison_dir):
-        for prf_file in glob.glob(os.path.join(unison_dir, "unison-*.prf")):
-            os.remove(prf_file)
-            print(f"Removed: {prf_file}")
-
-
-def check_large_logfiles(logfiles: set[str], max_lines: int) -> list[str]:
+        logger.info(f"Removed: {unison_log_dir}")
+
+    try:
+        entries = list(os.scandir(unison_dir))
+    except (FileNotFoundError, NotADirectoryError):
+        entries = []
+    remove = os.remove
+    for entry in entries:
+        name = entry.name
+        if name == HEALTH_STATE_FILENAME or (
+            name.startswith("unison-") and name.endswith(".prf")
+        ):
+            remove(entry.path)
+            logger.info(f"Removed: {entry.path}")
+
+
+def check_large_logfiles(logfiles: set[str], max_lines: int) -> list[tuple[str, str]]:
     """
-    Return log files that exceed the maximum line count.
+    Return log files that exceed the maximum line count, with the reason.
+
+    The decision is made from the file size where possible: a file with no
+    more bytes than max_lines cannot exceed it, and a file larger than
+    max_lines * AVG_BYTES_PER_LINE is treated as too large. Lines are only
+    counted for files in between.
 
     Args:
         logfiles: Set of log file paths to check.
         max_lines: Maximum number of lines allowed.
 
     Returns:
-        List of log files exceeding max_lines.
+        List of (logfile, reason) tuples, where reason names the exceeded
+        limit, e.g. "1000 lines" or "200000 bytes".
     """
+    max_log_bytes = max_lines * AVG_BYTES_PER_LINE
+    stat_path = os.stat
     large = []
     for logfile in logfiles:
-        if os.path.exists(logfile) and _count_lines(logfile) > max_lines:
-            large.append(logfile)
+        try:
+            size = stat_path(logfile).st_size
+        except FileNotFoundError:
+            continue
+        if size <= max_lines:
+            continue
+        if size > max_log_bytes:
+            large.append((logfile, f"{max_log_bytes} bytes"))
+        elif _count_lines(logfile) > max_lines:
+            large.append((logfile, f"{max_lines} lines"))
     return large
 
 
@@ -169,41 +333,6 @@ def write_common_prf(unison_dir: str, sync_interval: int) -> None:
         unison_dir: Directory for Unison profiles.
         sync_interval: Seconds between sync polls.
     """
-    prf_content = f"""ignore = Name {{.DS_Store,.Spotlight-V100,.Trashes,.fseventsd}}
-ignore = Path */{{.metadata,.settings,.project,.classpath}}
-ignore = Name {{.iml,.iws}}
-ignore = Path */.idea
-ignore = Name {{[._]*.s[a-v][a-z],[._]*.sw[a-p],[._]s[a-v][a-z],[._]sw[a-p],Session.vim,Sessionx.vim}}
-ignore = BelowPath */{{env,logs,out}}
-ignore    = Path */build/*/*/*/*/build/{{,.}}?*
-ignorenot = Path */build/*/*/*/*/build/brazil-integration-tests
-ignore    = Path */build/*/*/*/*/build/brazil-integration-tests/{{,.}}?*
-ignorenot = Path */build/*/*/*/*/build/brazil-integration-tests/{{*.html,*.css,com}}
-ignorenot = Path */build/*/*/*/*/build/brazil-integ-tests
-ignore    = Path */build/*/*/*/*/build/brazil-integ-tests/{{,.}}?*
-ignorenot = Path */build/*/*/*/*/build/brazil-integ-tests/{{*.html,*.css,com}}
-ignorenot = Path */build/*/*/*/*/build/brazil-unit-tests
-ignore    = Path */build/*/*/*/*/build/brazil-unit-tests/{{,.}}?*
-ignorenot = Path */build/*/*/*/*/build/brazil-unit-tests/{{*.html,*.css,com}}
-ignorenot = Path */build/*/*/*/*/build/generated-src
-ignore    = Path */build/*/*/*/*/build/generated-src/{{,.}}?*
-ignorenot = Path */build/*/*/*/*/build/generated-src/{{*.html,*.css,com}}
-ignore = Name log{{,s}}/*.log{{,.*}}
-ignore  = Path Neuron-Nemo-Megatron/src/Neuron-Nemo-Megatron/nemo/examples/nlp/language_modeling/neuronxcc-*
-ignore  = Path context_parallel/neuronxcc-*
-ignore = Path .unison
-ignorecase = false
-repeat = {sync_interval}
-backup = Name *
-maxbackups = 5
-retry = 1
-auto = true
-batch = true
-confirmbigdeletes = true
-times = true
-prefer = newer
-terse = true
-contactquietly = true"""
-    prf_path = os.path.join(unison_dir, "unison-common_settings.prf")
-    with open(prf_path, "w") as f:
-        f.write(prf_content)
+    prf_content = _COMMON_PRF_TEMPLATE.format(sync_interval=sync_interval)
+    prf_path = os.path.join(unison_dir, COMMON_PRF_FILENAME)
+    write_if_changed(prf_path, prf_content)
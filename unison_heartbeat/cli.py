@@ -8,6 +8,7 @@ from typing import Any
 
 from unison_heartbeat import launchagent, systemd
 from unison_heartbeat.manager import run
+from unison_heartbeat.output import configure_output
 
 _BACKENDS: dict[str, types.ModuleType] = {
     "darwin": launchagent,
@@ -84,6 +85,7 @@ def main() -> None:
     daemon_p.add_argument("config_path", help="Path to JSON config file")
 
     args = parser.parse_args()
+    configure_output()
 
     if not args.command:
         parser.print_help()
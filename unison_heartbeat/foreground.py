@@ -1,11 +1,15 @@
 """Foreground sync mode for Linux (run in tmux/screen, stop with Ctrl+C)."""
 
+import logging
 import os
 from typing import Any
 
 from unison_heartbeat.cache import cleanup_artifacts, get_unison_paths
-from unison_heartbeat.health import check_sync_health
+from unison_heartbeat.health import check_sync_health_batch
 from unison_heartbeat.manager import run
+from unison_heartbeat.output import flush_output
+
+logger = logging.getLogger(__name__)
 
 
 def start(config: dict[str, Any]) -> None:
@@ -17,9 +21,9 @@ def start(config: dict[str, Any]) -> None:
                 heartbeat_interval, and max_log_lines.
     """
     sync_points = config["sync_points"]
-    print(f"Starting foreground sync with {len(sync_points)} sync point(s)")
-    print(f"Log directory: {config['unison_log_dir']}")
-    print("Press Ctrl+C to stop.\n")
+    logger.info(f"Starting foreground sync with {len(sync_points)} sync point(s)")
+    logger.info(f"Log directory: {config['unison_log_dir']}")
+    logger.info("Press Ctrl+C to stop.\n")
 
     run(config)
 
@@ -32,7 +36,7 @@ def stop(config: dict[str, Any]) -> None:
         config: Configuration dictionary with unison_log_dir and sync_points.
     """
     cleanup_artifacts(config)
-    print("Cleaned up sync artifacts.")
+    logger.info("Cleaned up sync artifacts.")
 
 
 def status(config: dict[str, Any]) -> None:
@@ -47,13 +51,20 @@ def status(config: dict[str, Any]) -> None:
     sync_points = config["sync_points"]
 
     paths = get_unison_paths(config)
-    print(f"Log dir: {paths['unison_log_dir']}")
+    logger.info(f"Log dir: {paths['unison_log_dir']}")
 
-    print(f"\nSync points: {len(sync_points)} configured")
-    print("Checking sync health (this may take a few seconds per sync point)...")
-    for sp in sync_points:
+    logger.info(f"\nSync points: {len(sync_points)} configured")
+    logger.info("Checking sync health (this may take a few seconds)...")
+    flush_output()
+    logfiles = [
+        os.path.join(unison_log_dir, f"unison-{sp['ssh']}.log") for sp in sync_points
+    ]
+    health = check_sync_health_batch(
+        [sp["local_dir"] for sp in sync_points], logfiles, status_check_timeout
+    )
+    for sp, healthy in zip(sync_points, health):
         ssh_name = sp["ssh"]
-        logfile = os.path.join(unison_log_dir, f"unison-{ssh_name}.log")
-        healthy = check_sync_health(sp["local_dir"], logfile, status_check_timeout)
         status_str = "healthy" if healthy else "STUCK"
-        print(f"  {ssh_name}: {sp['local_dir']} <-> {sp['remote_dir']} [{status_str}]")
+        logger.info(
+            f"  {ssh_name}: {sp['local_dir']} <-> {sp['remote_dir']} [{status_str}]"
+        )
@@ -1,11 +1,32 @@
 """Heartbeat-based health detection for Unison sync points."""
 
+import json
 import os
+import select
+import threading
 import time
+from typing import Optional
 
+from unison_heartbeat.cache import write_if_changed
 from unison_heartbeat.sync_point import write_heartbeat
 
 
+def _safe_mtime(path: str) -> int:
+    """
+    Return a file's modification time in nanoseconds, or 0 if it is missing.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        Modification time in integer nanoseconds, 0 if the file does not exist.
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
 def check_sync_health(local_dir: str, logfile: str, timeout: int) -> bool:
     """
     Check if sync is working by writing a heartbeat file and verifying log updates.
@@ -22,8 +43,198 @@ def check_sync_health(local_dir: str, logfile: str, timeout: int) -> bool:
     Returns:
         True if sync is healthy, False if stuck.
     """
-    mtime_before = os.path.getmtime(logfile) if os.path.exists(logfile) else 0
+    mtime_before = _safe_mtime(logfile)
     write_heartbeat(local_dir)
     time.sleep(timeout)
-    mtime_after = os.path.getmtime(logfile) if os.path.exists(logfile) else 0
+    mtime_after = _safe_mtime(logfile)
     return mtime_after > mtime_before
+
+
+# Longest single kevent wait, so a set stop event is noticed promptly.
+_KQUEUE_WAIT_SLICE = 1.0
+
+
+def _heartbeat_and_watch(
+    local_dirs: list[str],
+    logfiles: list[str],
+    timeout: int,
+    stop_event: Optional[threading.Event] = None,
+) -> set[str]:
+    """
+    Write heartbeats and wait for log writes using kqueue vnode events.
+
+    Registers a write watch on each existing log file before writing the
+    heartbeats, then blocks in kevent until every log file has reported a
+    write or the timeout elapses, so idle waiting costs no syscalls. If some
+    log files do not exist yet, the full timeout is waited so they can still
+    be picked up by the caller's mtime check.
+
+    Args:
+        local_dirs: Local directories being synced.
+        logfiles: Log file paths to watch.
+        timeout: Maximum seconds to wait.
+        stop_event: If set during the wait, return early.
+
+    Returns:
+        Set of log files that were written to during the wait.
+    """
+    kq = select.kqueue()
+    fds: dict[int, str] = {}
+    try:
+        for lf in set(logfiles):
+            try:
+                fds[os.open(lf, os.O_RDONLY)] = lf
+            except FileNotFoundError:
+                continue
+        kq.control(
+            [
+                select.kevent(
+                    fd,
+                    filter=select.KQ_FILTER_VNODE,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                    fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND,
+                )
+                for fd in fds
+            ],
+            0,
+        )
+        for local_dir in local_dirs:
+            write_heartbeat(local_dir)
+
+        wait_full = len(fds) < len(set(logfiles))
+        written: set[str] = set()
+        deadline = time.monotonic() + timeout
+        remaining = float(timeout)
+        while remaining > 0 and (wait_full or len(written) < len(fds)):
+            if stop_event is not None and stop_event.is_set():
+                break
+            wait = min(remaining, _KQUEUE_WAIT_SLICE)
+            for event in kq.control(None, max(len(fds), 1), wait):
+                written.add(fds[event.ident])
+            remaining = deadline - time.monotonic()
+        return written
+    finally:
+        kq.close()
+        for fd in fds:
+            os.close(fd)
+
+
+def check_sync_health_batch(
+    local_dirs: list[str],
+    logfiles: list[str],
+    timeout: int,
+    stop_event: Optional[threading.Event] = None,
+) -> list[bool]:
+    """
+    Check several sync points at once, sharing a single wait period.
+
+    Writes a heartbeat to every local directory, waits for the timeout period
+    once, then checks each log file for a modification time increase. A cycle
+    takes timeout seconds regardless of the number of sync points. Where
+    kqueue is available (macOS/BSD) the wait is event-driven and ends early
+    once every log file has been written to.
+
+    Args:
+        local_dirs: Local directories being synced.
+        logfiles: Log file paths, aligned with local_dirs.
+        timeout: Seconds to wait for syncs to complete.
+        stop_event: If set during the wait, return early; the results are
+            then incomplete and should be discarded.
+
+    Returns:
+        List of health flags aligned with local_dirs (True if healthy).
+    """
+    mtimes_before = [_safe_mtime(lf) for lf in logfiles]
+    if hasattr(select, "kqueue"):
+        written = _heartbeat_and_watch(local_dirs, logfiles, timeout, stop_event)
+    else:
+        written = set()
+        for local_dir in local_dirs:
+            write_heartbeat(local_dir)
+        if stop_event is not None:
+            stop_event.wait(timeout)
+        else:
+            time.sleep(timeout)
+    return [
+        lf in written or _safe_mtime(lf) > before
+        for lf, before in zip(logfiles, mtimes_before)
+    ]
+
+
+def health_state_max_age(heartbeat_interval: int) -> float:
+    """
+    Get how long a recorded health result stays valid for status queries.
+
+    One monitor cycle takes about twice the heartbeat interval (the wait
+    between cycles plus the heartbeat check itself), so results are refreshed
+    roughly every 2x interval; allowing 3x leaves one interval of slack before
+    a result from a live monitor loop is treated as stale.
+
+    Args:
+        heartbeat_interval: Heartbeat interval of the monitor loop in seconds.
+
+    Returns:
+        Maximum age in seconds of a reusable recorded result.
+    """
+    return 3 * heartbeat_interval
+
+
+def save_health_state(state_path: str, logfiles: list[str], health: list[bool]) -> None:
+    """
+    Record the latest health check results for other processes to reuse.
+
+    Args:
+        state_path: Path to the health state file.
+        logfiles: Log file paths that were checked.
+        health: Health flags aligned with logfiles.
+    """
+    now = time.time()
+    state = {lf: [now, healthy] for lf, healthy in zip(logfiles, health)}
+    write_if_changed(state_path, json.dumps(state))
+
+
+def check_sync_health_cached(
+    local_dirs: list[str],
+    logfiles: list[str],
+    timeout: int,
+    state_path: str,
+    max_age: float,
+) -> list[bool]:
+    """
+    Check sync points, reusing results recorded by a running monitor loop.
+
+    Sync points whose result in the state file is younger than max_age are
+    answered from it without writing a heartbeat or waiting; the rest are
+    checked live with check_sync_health_batch.
+
+    Args:
+        local_dirs: Local directories being synced.
+        logfiles: Log file paths, aligned with local_dirs.
+        timeout: Seconds to wait for syncs checked live.
+        state_path: Path to the health state file.
+        max_age: Maximum age in seconds of a reusable recorded result.
+
+    Returns:
+        List of health flags aligned with local_dirs (True if healthy).
+    """
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    now = time.time()
+    results: list[bool | None] = []
+    for lf in logfiles:
+        entry = state.get(lf)
+        fresh = isinstance(entry, list) and now - entry[0] < max_age
+        results.append(bool(entry[1]) if fresh else None)
+
+    stale = [i for i, healthy in enumerate(results) if healthy is None]
+    if stale:
+        live = check_sync_health_batch(
+            [local_dirs[i] for i in stale], [logfiles[i] for i in stale], timeout
+        )
+        for i, healthy in zip(stale, live):
+            results[i] = healthy
+    return [bool(healthy) for healthy in results]
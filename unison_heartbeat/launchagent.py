@@ -1,14 +1,23 @@
 """Generate and install macOS LaunchAgent for Unison sync."""
 
+import functools
 import json
+import logging
 import os
+import re
 import subprocess
 import sys
 from typing import Any
 
-from unison_heartbeat.cache import (clean_unison_state, cleanup_artifacts,
-                                    get_unison_paths)
-from unison_heartbeat.health import check_sync_health
+from unison_heartbeat.cache import (HEALTH_STATE_FILENAME, clean_unison_state,
+                                    cleanup_artifacts, get_unison_paths,
+                                    write_if_changed)
+from unison_heartbeat.health import (check_sync_health_batch,
+                                     check_sync_health_cached,
+                                     health_state_max_age)
+from unison_heartbeat.output import flush_output
+
+logger = logging.getLogger(__name__)
 
 PLIST_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
@@ -39,7 +48,18 @@ PLIST_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
 
 LABEL = "com.user.unison-sync"
 
+# launchctl output meaning bootstrap/bootout are unknown or were misused.
+_UNSUPPORTED_MARKERS = ("Unrecognized subcommand", "Usage:")
+
+# bootout results meaning the agent was not loaded: ESRCH (3) and 113.
+_NOT_LOADED_CODES = (3, 113)
+_NOT_LOADED_MARKERS = ("No such process", "Could not find specified service")
+
+_PID_RE = re.compile(r'"PID"\s*=\s*(\d+);')
+_EXIT_STATUS_RE = re.compile(r'"LastExitStatus"\s*=\s*(-?\d+);')
 
+
+@functools.lru_cache(maxsize=None)
 def _get_config_path() -> str:
     """Get the path to store the config for the daemon."""
     home = os.environ.get("HOME")
@@ -48,6 +68,7 @@ def _get_config_path() -> str:
     return os.path.join(home, ".unison", "heartbeat-config.json")
 
 
+@functools.lru_cache(maxsize=None)
 def _get_plist_dest() -> str:
     """Get the destination path for the LaunchAgent plist file."""
     home = os.environ.get("HOME")
@@ -56,6 +77,41 @@ def _get_plist_dest() -> str:
     return os.path.join(home, "Library", "LaunchAgents", f"{LABEL}.plist")
 
 
+def _get_gui_domain() -> str:
+    """Get the launchctl domain target for the current user's GUI session."""
+    return f"gui/{os.getuid()}"
+
+
+def _is_unsupported(result: subprocess.CompletedProcess) -> bool:
+    """
+    Check whether launchctl rejected a subcommand as unknown or misused.
+
+    Args:
+        result: Completed launchctl invocation with text output.
+
+    Returns:
+        True if the legacy load/unload subcommands should be used instead.
+    """
+    output = result.stdout + result.stderr
+    return result.returncode != 0 and any(m in output for m in _UNSUPPORTED_MARKERS)
+
+
+def _is_not_loaded(result: subprocess.CompletedProcess) -> bool:
+    """
+    Check whether launchctl bootout failed only because nothing was loaded.
+
+    Args:
+        result: Completed launchctl bootout invocation with text output.
+
+    Returns:
+        True if the agent was not loaded in the first place.
+    """
+    output = result.stdout + result.stderr
+    return result.returncode in _NOT_LOADED_CODES or any(
+        m in output for m in _NOT_LOADED_MARKERS
+    )
+
+
 def _load_saved_config() -> dict[str, Any]:
     """
     Load config from the saved location.
@@ -89,8 +145,7 @@ def start(config: dict[str, Any]) -> None:
 
     config_path = _get_config_path()
     os.makedirs(os.path.dirname(config_path), exist_ok=True)
-    with open(config_path, "w") as f:
-        json.dump(config, f)
+    write_if_changed(config_path, json.dumps(config))
 
     unison_py = os.path.join(
         os.path.dirname(os.path.abspath(__file__)), "..", "unison.py"
@@ -105,19 +160,26 @@ def start(config: dict[str, Any]) -> None:
     dest = _get_plist_dest()
 
     os.makedirs(os.path.dirname(dest), exist_ok=True)
-    with open(dest, "w") as f:
-        f.write(plist_content)
-    print(f"Created: {dest}")
+    write_if_changed(dest, plist_content)
+    logger.info(f"Created: {dest}")
 
     os.makedirs(unison_log_dir, exist_ok=True)
-    print(f"Created: {unison_log_dir}")
+    logger.info(f"Created: {unison_log_dir}")
 
-    result = subprocess.run(["launchctl", "load", dest], capture_output=True, text=True)
+    result = subprocess.run(
+        ["launchctl", "bootstrap", _get_gui_domain(), dest],
+        capture_output=True,
+        text=True,
+    )
+    if _is_unsupported(result):
+        result = subprocess.run(
+            ["launchctl", "load", dest], capture_output=True, text=True
+        )
     if result.returncode == 0:
-        print("LaunchAgent loaded successfully.")
-        print("\nSync running.")
+        logger.info("LaunchAgent loaded successfully.")
+        logger.info("\nSync running.")
     else:
-        print(f"Failed to load: {result.stderr}")
+        logger.error(f"Failed to load: {result.stderr}")
         sys.exit(1)
 
 
@@ -136,10 +198,18 @@ def force_start(config: dict[str, Any]) -> None:
 def stop() -> None:
     """Unload and remove the LaunchAgent and clean up artifacts."""
     dest = _get_plist_dest()
-    subprocess.run(["launchctl", "unload", dest], capture_output=True)
+    result = subprocess.run(
+        ["launchctl", "bootout", f"{_get_gui_domain()}/{LABEL}"],
+        capture_output=True,
+        text=True,
+    )
+    if _is_unsupported(result):
+        subprocess.run(["launchctl", "unload", dest], capture_output=True)
+    elif result.returncode != 0 and not _is_not_loaded(result):
+        logger.warning(f"Warning: failed to unload: {result.stderr}")
     if os.path.exists(dest):
         os.remove(dest)
-        print(f"Removed: {dest}")
+        logger.info(f"Removed: {dest}")
 
     config_path = _get_config_path()
     if os.path.exists(config_path):
@@ -151,12 +221,35 @@ def stop() -> None:
                 log_path = os.path.join(unison_log_dir, log_file)
                 if os.path.exists(log_path):
                     os.remove(log_path)
-                    print(f"Removed: {log_path}")
+                    logger.info(f"Removed: {log_path}")
 
         os.remove(config_path)
         cleanup_artifacts(config)
 
-    print("LaunchAgent stopped.")
+    logger.info("LaunchAgent stopped.")
+
+
+def _decode_exit_status(raw: str) -> str:
+    """
+    Convert launchctl's raw LastExitStatus into an exit code.
+
+    ``launchctl list <label>`` reports the raw waitpid status (exit code 1
+    shows as 256), whereas the tabular ``launchctl list`` shows the exit code,
+    or the negated signal number for a killed process.
+
+    Args:
+        raw: LastExitStatus value as printed by launchctl.
+
+    Returns:
+        The exit code (negative signal number if killed) as a string.
+    """
+    status = int(raw)
+    if status < 0:
+        return raw
+    try:
+        return str(os.waitstatus_to_exitcode(status))
+    except ValueError:
+        return raw
 
 
 def _print_launchctl_status() -> tuple[str | None, str | None]:
@@ -166,17 +259,15 @@ def _print_launchctl_status() -> tuple[str | None, str | None]:
     Returns:
         Tuple of (pid, exit_status), either may be None.
     """
-    pid = None
-    exit_status = None
-    result = subprocess.run(["launchctl", "list"], capture_output=True, text=True)
-    for line in result.stdout.splitlines():
-        if LABEL not in line:
-            continue
-        parts = line.split()
-        if len(parts) >= 2:
-            pid = parts[0] if parts[0] != "-" else None
-            exit_status = parts[1] if len(parts) > 1 else None
-        break
+    result = subprocess.run(
+        ["launchctl", "list", LABEL], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, None
+    pid_match = _PID_RE.search(result.stdout)
+    exit_match = _EXIT_STATUS_RE.search(result.stdout)
+    pid = pid_match.group(1) if pid_match else None
+    exit_status = _decode_exit_status(exit_match.group(1)) if exit_match else None
     return pid, exit_status
 
 
@@ -189,32 +280,45 @@ def status() -> None:
 
     plist_path = _get_plist_dest()
     plist_installed = os.path.exists(plist_path)
-    print(f"LaunchAgent: {'installed' if plist_installed else 'not installed'}")
-    print(f"Plist: {plist_path}")
+    logger.info(f"LaunchAgent: {'installed' if plist_installed else 'not installed'}")
+    logger.info(f"Plist: {plist_path}")
 
     if not plist_installed:
-        print("Status: not installed")
+        logger.info("Status: not installed")
         return
 
     pid, exit_status = _print_launchctl_status()
     if pid:
-        print(f"Status: running (PID: {pid})")
+        logger.info(f"Status: running (PID: {pid})")
     else:
         status_msg = (
             f"not running (exit: {exit_status})" if exit_status else "not running"
         )
-        print(f"Status: {status_msg}")
+        logger.info(f"Status: {status_msg}")
 
     paths = get_unison_paths(config)
-    print(f"Log dir: {paths['unison_log_dir']}")
-
-    print(f"\nSync points: {len(sync_points)} configured")
-    print("Checking sync health (this may take a few seconds per sync point)...")
-    for sp in sync_points:
+    logger.info(f"Log dir: {paths['unison_log_dir']}")
+
+    logger.info(f"\nSync points: {len(sync_points)} configured")
+    logger.info("Checking sync health (this may take a few seconds)...")
+    flush_output()
+    logfiles = [
+        os.path.join(unison_log_dir, f"unison-{sp['ssh']}.log") for sp in sync_points
+    ]
+    local_dirs = [sp["local_dir"] for sp in sync_points]
+    if pid:
+        health = check_sync_health_cached(
+            local_dirs,
+            logfiles,
+            status_check_timeout,
+            state_path=os.path.join(paths["unison_dir"], HEALTH_STATE_FILENAME),
+            max_age=health_state_max_age(config["heartbeat_interval"]),
+        )
+    else:
+        health = check_sync_health_batch(local_dirs, logfiles, status_check_timeout)
+    for sp, healthy in zip(sync_points, health):
         ssh_name = sp["ssh"]
-        logfile = os.path.join(unison_log_dir, f"unison-{ssh_name}.log")
-        healthy = check_sync_health(sp["local_dir"], logfile, status_check_timeout)
         status_str = "healthy" if healthy else "STUCK"
-        print(
+        logger.info(
             f"  {ssh_name}: {sp['local_dir']} <-> {sp['remote_dir']}" f" [{status_str}]"
         )
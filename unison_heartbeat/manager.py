@@ -1,31 +1,47 @@
 """Wrapper to initiate and control multiple Unison sync points."""
 
+import functools
+import logging
 import os
+import shutil
+import signal
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
-from unison_heartbeat.cache import (check_large_logfiles, delete_logfile,
+from unison_heartbeat.cache import (HEALTH_STATE_FILENAME,
+                                    check_large_logfiles, delete_logfile,
                                     init_unison, write_common_prf)
-from unison_heartbeat.health import check_sync_health
-from unison_heartbeat.sync_point import start_sync, stop_sync, write_prf
+from unison_heartbeat.health import check_sync_health_batch, save_health_state
+from unison_heartbeat.output import flush_output
+from unison_heartbeat.sync_point import (profile_name, start_sync, stop_sync,
+                                         write_prf)
 
+logger = logging.getLogger(__name__)
 
-def _log_restart(logfile: str, ssh_name: str) -> None:
+
+def _log_restart(
+    logfile: str, ssh_name: str, reason: str = "no log activity detected"
+) -> None:
     """
     Write a timestamped restart event to the log file.
 
     Args:
         logfile: Path to the log file.
         ssh_name: SSH host name that was restarted.
+        reason: Why the sync was restarted.
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     with open(logfile, "a") as f:
-        f.write(f"\n[{timestamp}] RESTART: {ssh_name} - no log activity detected\n")
+        f.write(f"\n[{timestamp}] RESTART: {ssh_name} - {reason}\n")
 
 
+@functools.lru_cache(maxsize=None)
 def find_unison_binary() -> str:
     """
     Find the unison binary path.
@@ -36,10 +52,8 @@ def find_unison_binary() -> str:
     Raises:
         FileNotFoundError: If unison binary is not found.
     """
-    result = subprocess.run(["which", "unison"], capture_output=True, text=True)
-    if result.returncode == 0:
-        found = result.stdout.strip()
-    else:
+    found = shutil.which("unison")
+    if not found:
         if sys.platform == "linux":
             candidates = ["/usr/bin/unison", "/usr/local/bin/unison"]
         else:
@@ -56,27 +70,39 @@ def find_unison_binary() -> str:
     return found
 
 
+@dataclass
+class SyncState:
+    """Runtime state of one sync point managed by the monitor loop."""
+
+    __slots__ = ("profile", "logfile", "sync", "proc")
+
+    profile: str
+    logfile: str
+    sync: dict[str, str]
+    proc: subprocess.Popen
+
+
 def _start_all_syncs(
     config: dict[str, Any],
     dirs: dict[str, str],
     unison_path: str,
-) -> tuple[dict[str, str], dict[str, dict[str, str]], dict[str, subprocess.Popen]]:
+) -> list[SyncState]:
     """
     Write profiles and start sync processes for all configured sync points.
 
+    Sync points are set up concurrently: each writes its own profile and
+    spawns an independent Unison process, so the fork/exec work overlaps.
+
     Args:
         config: Configuration dictionary.
         dirs: Dictionary with unison_dir and unison_log_dir paths.
         unison_path: Path to unison binary.
 
     Returns:
-        Tuple of (profile_logfiles, profile_to_sync, processes) mappings.
+        One SyncState per sync point, in config order.
     """
-    profile_logfiles: dict[str, str] = {}
-    profile_to_sync: dict[str, dict[str, str]] = {}
-    processes: dict[str, subprocess.Popen] = {}
 
-    for sync in config["sync_points"]:
+    def setup_sync(sync: dict[str, str]) -> SyncState:
         prf_name, logfile = write_prf(
             unison_dir=dirs["unison_dir"],
             unison_log_dir=dirs["unison_log_dir"],
@@ -84,17 +110,19 @@ def _start_all_syncs(
             remote_dir=sync["remote_dir"],
             local_dir=sync["local_dir"],
         )
-        profile_logfiles[prf_name] = logfile
-        profile_to_sync[prf_name] = sync
-        processes[prf_name] = start_sync(unison_path, prf_name)
+        return SyncState(prf_name, logfile, sync, start_sync(unison_path, prf_name))
 
-    return profile_logfiles, profile_to_sync, processes
+    syncs = config["sync_points"]
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(syncs)))) as executor:
+        return list(executor.map(setup_sync, syncs))
 
 
 def run(config: dict[str, Any]) -> None:
     """
     Start Unison sync agents and monitor their health.
 
+    Runs until interrupted with Ctrl+C or SIGTERM, then stops all syncs.
+
     Args:
         config: Configuration dictionary with sync_points, unison_log_dir,
                 heartbeat_interval, and max_log_lines.
@@ -106,33 +134,69 @@ def run(config: dict[str, Any]) -> None:
     heartbeat_interval = config["heartbeat_interval"]
     max_log_lines = config["max_log_lines"]
 
-    dirs = init_unison(config)
+    dirs = init_unison(
+        config,
+        keep_profiles=[
+            profile_name(sync["ssh"], sync["remote_dir"])
+            for sync in config["sync_points"]
+        ],
+    )
     unison_path = find_unison_binary()
     write_common_prf(dirs["unison_dir"], 5)
 
-    profile_logfiles, profile_to_sync, processes = _start_all_syncs(
-        config, dirs, unison_path
-    )
-    logfiles = set(profile_logfiles.values())
+    states = _start_all_syncs(config, dirs, unison_path)
+    logfiles = {state.logfile for state in states}
+    health_state_path = os.path.join(dirs["unison_dir"], HEALTH_STATE_FILENAME)
 
-    try:
-        while True:
-            time.sleep(heartbeat_interval)
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
 
-            for lf in check_large_logfiles(logfiles, max_log_lines):
-                print(f"[DELETE] {lf} exceeded {max_log_lines} lines")
+    try:
+        flush_output()
+        while not shutdown.wait(heartbeat_interval):
+            for lf, reason in check_large_logfiles(logfiles, max_log_lines):
+                logger.info(f"[DELETE] {lf} exceeded {reason}")
                 delete_logfile(lf)
 
-            for profile, logfile in profile_logfiles.items():
-                sync = profile_to_sync[profile]
-                if not check_sync_health(
-                    sync["local_dir"], logfile, heartbeat_interval
-                ):
-                    print(f"[STUCK] {sync['ssh']} - no log activity, restarting")
-                    _log_restart(logfile, sync["ssh"])
-                    stop_sync(processes[profile], profile)
-                    processes[profile] = start_sync(unison_path, profile)
+            running = []
+            for state in states:
+                returncode = state.proc.poll()
+                if returncode is None:
+                    running.append(state)
+                    continue
+                ssh_name = state.sync["ssh"]
+                logger.info(
+                    f"[EXITED] {ssh_name} - unison exited ({returncode}), restarting"
+                )
+                _log_restart(
+                    state.logfile, ssh_name, f"unison exited with code {returncode}"
+                )
+                state.proc = start_sync(unison_path, state.profile)
+
+            running_logfiles = [state.logfile for state in running]
+            health = check_sync_health_batch(
+                [state.sync["local_dir"] for state in running],
+                running_logfiles,
+                heartbeat_interval,
+                stop_event=shutdown,
+            )
+            if shutdown.is_set():
+                break
+            save_health_state(health_state_path, running_logfiles, health)
+            for state, healthy in zip(running, health):
+                if not healthy:
+                    ssh_name = state.sync["ssh"]
+                    logger.info(f"[STUCK] {ssh_name} - no log activity, restarting")
+                    _log_restart(state.logfile, ssh_name)
+                    stop_sync(state.proc, state.profile)
+                    state.proc = start_sync(unison_path, state.profile)
+            flush_output()
     except KeyboardInterrupt:
-        print("\nShutting down...")
-        for profile, proc in processes.items():
-            stop_sync(proc, profile)
+        pass
+    logger.info("\nShutting down...")
+    for state in states:
+        stop_sync(state.proc, state.profile)
+    try:
+        os.remove(health_state_path)
+    except FileNotFoundError:
+        pass
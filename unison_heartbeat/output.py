@@ -0,0 +1,31 @@
+"""Buffered console output for unison_heartbeat."""
+
+import logging
+import sys
+
+logger = logging.getLogger("unison_heartbeat")
+
+
+class _DeferredFlushHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to flush_output()."""
+
+    def flush(self) -> None:
+        """Skip the per-record flush; the stream is flushed in batches."""
+
+
+def configure_output() -> None:
+    """Send unison_heartbeat log records to stdout as plain messages."""
+    if logger.handlers:
+        return
+    handler = _DeferredFlushHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def flush_output() -> None:
+    """Flush buffered output, e.g. before blocking or at the end of a command."""
+    for handler in logger.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.stream.flush()
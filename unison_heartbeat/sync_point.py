@@ -1,11 +1,48 @@
 """Single sync point management for Unison."""
 
+import functools
+import logging
 import os
+import re
 import subprocess
-import time
+
+from unison_heartbeat.cache import write_if_changed
+
+logger = logging.getLogger(__name__)
 
 HEARTBEAT_FILENAME = ".unison-heartbeat"
 
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+_PRF_TEMPLATE = """root = {local_dir}
+root = ssh://{ssh_name}//{remote_dir}
+
+include unison-common_settings.prf
+
+log = true
+logfile = {logfile}
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def profile_name(ssh_name: str, remote_dir: str) -> str:
+    """
+    Get the Unison profile name for a sync point.
+
+    The name ends with the last component of the remote directory (trailing
+    slashes ignored), with characters unsafe in file names replaced by "_".
+
+    Args:
+        ssh_name: SSH host name.
+        remote_dir: Remote directory path.
+
+    Returns:
+        Profile name (without the .prf extension).
+    """
+    sync_dir_name = os.path.basename(remote_dir.rstrip("/")) or "root"
+    sync_dir_name = _UNSAFE_NAME_CHARS.sub("_", sync_dir_name)
+    return f"unison-{ssh_name}-{sync_dir_name}"
+
 
 def write_prf(
     *,
@@ -29,19 +66,15 @@ def write_prf(
         Tuple of (profile_name, logfile_path).
     """
     logfile = os.path.join(unison_log_dir, f"unison-{ssh_name}.log")
-    sync_dir_name = remote_dir.split("/")[-1]
-    prf_name = f"unison-{ssh_name}-{sync_dir_name}"
-    prf_content = f"""root = {local_dir}
-root = ssh://{ssh_name}//{remote_dir}
-
-include unison-common_settings.prf
-
-log = true
-logfile = {logfile}
-"""
+    prf_name = profile_name(ssh_name, remote_dir)
+    prf_content = _PRF_TEMPLATE.format(
+        local_dir=local_dir,
+        ssh_name=ssh_name,
+        remote_dir=remote_dir,
+        logfile=logfile,
+    )
     prf_path = os.path.join(unison_dir, f"{prf_name}.prf")
-    with open(prf_path, "w") as f:
-        f.write(prf_content)
+    write_if_changed(prf_path, prf_content)
     return prf_name, logfile
 
 
@@ -57,8 +90,15 @@ def start_sync(unison_path: str, profile: str) -> subprocess.Popen:
         The subprocess.Popen object for the running process.
     """
     cmd = [unison_path, "-ui", "text", profile]
-    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    print(f"Started Unison for {profile} (PID {proc.pid})")
+    # Descriptors are non-inheritable by default (PEP 446), so skipping the
+    # close_fds sweep is safe and lets CPython spawn via posix_spawn.
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=False,
+    )
+    logger.info(f"Started Unison for {profile} (PID {proc.pid})")
     return proc
 
 
@@ -72,16 +112,21 @@ def stop_sync(proc: subprocess.Popen, profile: str) -> None:
     """
     proc.terminate()
     proc.wait()
-    print(f"Stopped Unison for {profile}")
+    logger.info(f"Stopped Unison for {profile}")
 
 
 def write_heartbeat(local_dir: str) -> None:
     """
-    Write a heartbeat file to the local directory.
+    Touch the heartbeat file in the local directory.
+
+    Only the modification time matters to Unison (``times = true`` propagates
+    it), so an existing file is touched rather than rewritten.
 
     Args:
         local_dir: Local directory being synced.
     """
     heartbeat_path = os.path.join(local_dir, HEARTBEAT_FILENAME)
-    with open(heartbeat_path, "w") as f:
-        f.write(str(time.time()))
+    try:
+        os.utime(heartbeat_path, None)
+    except FileNotFoundError:
+        open(heartbeat_path, "wb").close()
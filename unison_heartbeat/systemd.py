@@ -1,19 +1,28 @@
 """Linux background service for Unison sync (nohup + PID file)."""
 
+import functools
 import json
+import logging
 import os
 import signal
 import subprocess
 import sys
 from typing import Any
 
-from unison_heartbeat.cache import (clean_unison_state, cleanup_artifacts,
-                                    get_unison_paths)
-from unison_heartbeat.health import check_sync_health
+from unison_heartbeat.cache import (HEALTH_STATE_FILENAME, clean_unison_state,
+                                    cleanup_artifacts, get_unison_paths,
+                                    write_if_changed)
+from unison_heartbeat.health import (check_sync_health_batch,
+                                     check_sync_health_cached,
+                                     health_state_max_age)
+from unison_heartbeat.output import flush_output
+
+logger = logging.getLogger(__name__)
 
 SERVICE_NAME = "unison-sync"
 
 
+@functools.lru_cache(maxsize=None)
 def _get_config_path() -> str:
     """Get the path to store the config for the daemon."""
     home = os.environ.get("HOME")
@@ -22,6 +31,7 @@ def _get_config_path() -> str:
     return os.path.join(home, ".unison", "heartbeat-config.json")
 
 
+@functools.lru_cache(maxsize=None)
 def _get_pid_path() -> str:
     """Get the path to the PID file."""
     home = os.environ.get("HOME")
@@ -30,6 +40,7 @@ def _get_pid_path() -> str:
     return os.path.join(home, ".unison", f"{SERVICE_NAME}.pid")
 
 
+@functools.lru_cache(maxsize=None)
 def _get_log_path() -> str:
     """Get the path to the daemon log file."""
     home = os.environ.get("HOME")
@@ -89,8 +100,7 @@ def start(config: dict[str, Any]) -> None:
 
     config_path = _get_config_path()
     os.makedirs(os.path.dirname(config_path), exist_ok=True)
-    with open(config_path, "w") as f:
-        json.dump(config, f)
+    write_if_changed(config_path, json.dumps(config))
 
     unison_py = os.path.join(
         os.path.dirname(os.path.abspath(__file__)), "..", "unison.py"
@@ -110,9 +120,9 @@ def start(config: dict[str, Any]) -> None:
     with open(pid_path, "w") as f:
         f.write(str(proc.pid))
 
-    print(f"Daemon started (PID: {proc.pid})")
-    print(f"Log: {log_path}")
-    print("\nSync running.")
+    logger.info(f"Daemon started (PID: {proc.pid})")
+    logger.info(f"Log: {log_path}")
+    logger.info("\nSync running.")
 
 
 def force_start(config: dict[str, Any]) -> None:
@@ -135,10 +145,10 @@ def stop() -> None:
     if pid:
         try:
             os.kill(pid, signal.SIGTERM)
-            print(f"Stopped daemon (PID: {pid})")
+            logger.info(f"Stopped daemon (PID: {pid})")
             stopped_anything = True
         except OSError as exc:
-            print(f"Warning: could not stop PID {pid}: {exc}")
+            logger.warning(f"Warning: could not stop PID {pid}: {exc}")
 
     pid_path = _get_pid_path()
     if os.path.exists(pid_path):
@@ -154,10 +164,10 @@ def stop() -> None:
     log_path = _get_log_path()
     if os.path.exists(log_path):
         os.remove(log_path)
-        print(f"Removed: {log_path}")
+        logger.info(f"Removed: {log_path}")
 
     if stopped_anything:
-        print("Service stopped.")
+        logger.info("Service stopped.")
 
 
 def status() -> None:
@@ -169,23 +179,36 @@ def status() -> None:
 
     pid = _read_pid()
     if pid:
-        print(f"Status: running (PID: {pid})")
+        logger.info(f"Status: running (PID: {pid})")
     else:
-        print("Status: not running")
+        logger.info("Status: not running")
 
     log_path = _get_log_path()
-    print(f"Daemon log: {log_path}")
+    logger.info(f"Daemon log: {log_path}")
 
     paths = get_unison_paths(config)
-    print(f"Sync log dir: {paths['unison_log_dir']}")
-
-    print(f"\nSync points: {len(sync_points)} configured")
-    print("Checking sync health (this may take a few seconds per sync point)...")
-    for sp in sync_points:
+    logger.info(f"Sync log dir: {paths['unison_log_dir']}")
+
+    logger.info(f"\nSync points: {len(sync_points)} configured")
+    logger.info("Checking sync health (this may take a few seconds)...")
+    flush_output()
+    logfiles = [
+        os.path.join(unison_log_dir, f"unison-{sp['ssh']}.log") for sp in sync_points
+    ]
+    local_dirs = [sp["local_dir"] for sp in sync_points]
+    if pid:
+        health = check_sync_health_cached(
+            local_dirs,
+            logfiles,
+            status_check_timeout,
+            state_path=os.path.join(paths["unison_dir"], HEALTH_STATE_FILENAME),
+            max_age=health_state_max_age(config["heartbeat_interval"]),
+        )
+    else:
+        health = check_sync_health_batch(local_dirs, logfiles, status_check_timeout)
+    for sp, healthy in zip(sync_points, health):
         ssh_name = sp["ssh"]
-        logfile = os.path.join(unison_log_dir, f"unison-{ssh_name}.log")
-        healthy = check_sync_health(sp["local_dir"], logfile, status_check_timeout)
         status_str = "healthy" if healthy else "STUCK"
-        print(
+        logger.info(
             f"  {ssh_name}: {sp['local_dir']} <-> {sp['remote_dir']}" f" [{status_str}]"
         )